@@ -9,6 +9,8 @@ and to perform some validation steps.
 
 
 class AST(object):
+    __slots__ = ()
+
     _nodes = {}
 
     @classmethod
@@ -20,32 +22,37 @@ class AST(object):
 
         cls._fields = list(cls.__annotations__)
 
-    def __init__(self, *args, **kwargs):
-        if len(args) != len(self._fields):
-            raise TypeError(f"{str(self)}: Expected {len(self._fields)} arguments")
-
-        for name, val in zip(self._fields, args):
-            setattr(self, name, val)
-
-        for name, val in kwargs.items():
-            setattr(self, name, val)
-
-    def __repr__(self):
-        parts = []
-
+        # Generate a plain positional __init__ for the node's fields.
+        # Filter trees allocate many small nodes, so a flat run of slot
+        # assignments beats a zip/setattr loop over _fields.
+        args = ", ".join(cls._fields)
+        assignments = "; ".join(f"self.{name} = {name}" for name in cls._fields)
+        namespace = {}
+        exec(f"def __init__(self, {args}): {assignments}", namespace)
+        cls.__init__ = namespace["__init__"]
+
+        # Also generate an unrolled child-visiting helper so that
+        # generic_visit does not have to iterate _fields and getattr
+        # per field on every node it touches.
+        visits = "; ".join(f"visitor.visit(self.{name})" for name in cls._fields)
+        exec(f"def _children(self, visitor): {visits}", namespace)
+        cls._children = namespace["_children"]
+
+    def _repr_parts(self):
         for name in self._fields:
             val = getattr(self, name)
 
             if isinstance(val, AST):
-                parts.append(f"{name}={type(val).__name__}")
+                yield f"{name}={type(val).__name__}"
 
             elif isinstance(val, list):
-                parts.append(f"{name}=[ len={len(val)} ]")
+                yield f"{name}=[ len={len(val)} ]"
 
             else:
-                parts.append(f"{name}={repr(val)}")
+                yield f"{name}={repr(val)}"
 
-        argstr = ", ".join(parts)
+    def __repr__(self):
+        argstr = ", ".join(self._repr_parts())
 
         return f"{type(self).__name__}({argstr})"
 
@@ -76,25 +83,66 @@ class AST(object):
 
 
 class Filter(AST):
+    __slots__ = ("expr", "negated", "namespace")
+
     expr: AST
     negated: bool
     namespace: AST
 
 
 class LogExpr(AST):
+    __slots__ = ("op", "expr1", "expr2")
+
     op: str
     expr1: Filter
     expr2: Filter
 
 
 class SubAttr(AST):
+    __slots__ = ("value",)
+
     value: str
 
 
 class AttrPath(AST):
+    __slots__ = ("attr_name", "sub_attr", "uri", "_key", "_lower_key")
+
     attr_name: str
-    sub_attr: (SubAttr, type(None))
-    uri: (str, type(None))
+    sub_attr: "SubAttr | None"
+    uri: "str | None"
+
+    @property
+    def path_key(self) -> tuple:
+        """
+        The (attr_name, sub_attr value, uri) tuple transpilers use for
+        attr map lookups. It is computed once per node; the parser's
+        sub_attr rewrites all happen before any transpiler runs.
+        """
+        try:
+            return self._key
+        except AttributeError:
+            sub_attr = self.sub_attr.value if self.sub_attr else None
+            self._key = (self.attr_name, sub_attr, self.uri)
+            return self._key
+
+    @property
+    def lower_path_key(self) -> tuple:
+        """
+        path_key with each part case-folded, for transpilers that
+        match their attr map case-insensitively. Cached on the node,
+        which pays off now that parsed trees are shared across
+        transpile runs.
+        """
+        try:
+            return self._lower_key
+        except AttributeError:
+            attr_name, sub_attr, uri = self.path_key
+            self._lower_key = (
+                attr_name.lower(),
+                sub_attr.lower() if sub_attr else None,
+                uri.lower() if uri else None,
+            )
+            return self._lower_key
 
     @property
     def case_insensitive(self):
@@ -104,10 +152,14 @@ class AttrPath(AST):
 
 
 class CompValue(AST):
+    __slots__ = ("value",)
+
     value: str
 
 
 class AttrExpr(AST):
+    __slots__ = ("value", "attr_path", "comp_value")
+
     value: str
     attr_path: AttrPath
     comp_value: CompValue
@@ -119,25 +171,11 @@ class AttrExpr(AST):
 
 # The following classes for visiting and rewriting the AST are taken
 # from Python's ast module.   It's really easy to make mistakes when
-# naming methods in visitor classes so there's a bit of metaprogramming
-# to make sure we're not writing duplicate definitions and to make
-# sure methods match up with the names of actual AST nodes.
-
-
-class VisitDict(dict):
-    def __setitem__(self, key, value):
-        if key in self:
-            raise AttributeError(f"Duplicate definition for {key}")
-        super().__setitem__(key, value)
-
-
-class NodeVisitMeta(type):
-    @classmethod
-    def __prepare__(cls, name, bases):
-        return VisitDict()
+# naming methods in visitor classes so __init_subclass__ makes sure
+# methods match up with the names of actual AST nodes.
 
 
-class NodeVisitor(metaclass=NodeVisitMeta):
+class NodeVisitor:
     """
     Class for visiting nodes of the parse tree.  This is modeled after
     a similar class in the standard library ast.NodeVisitor.  For each
@@ -160,37 +198,48 @@ class NodeVisitor(metaclass=NodeVisitMeta):
         VisitOps().visit(tree)
     """
 
+    _dispatch = {}
+
     def visit(self, node):
         """
         Execute a method of the form visit_NodeName(node) where
-        NodeName is the name of the class of a particular node.
+        NodeName is the name of the class of a particular node. The
+        methods are looked up in a dispatch table precomputed at class
+        creation rather than via getattr on every node.
         """
         if isinstance(node, list):
             for item in node:
                 self.visit(item)
         elif isinstance(node, AST):
-            method = "visit_" + node.__class__.__name__
-            visitor = getattr(self, method, self.generic_visit)
-            visitor(node)
+            method = self._dispatch.get(type(node))
+            if method is None:
+                self.generic_visit(node)
+            else:
+                method(self, node)
 
     def generic_visit(self, node):
         """
         Method executed if no applicable `visit_` method can be found.
-        This examines the node to see if it has `_fields`, is a list,
-        or can be further traversed.
+        This visits each of the node's fields via the unrolled
+        `_children` helper generated for the node's class.
         """
-        for field in node._fields:
-            value = getattr(node, field, None)
-            self.visit(value)
+        node._children(self)  # noqa: SLF001
 
     @classmethod
     def __init_subclass__(cls):
         """
-        Sanity check. Make sure that visitor classes use the right names.
+        Sanity check. Make sure that visitor classes use the right names,
+        and extend the inherited dispatch table with this class's
+        visit_NodeName methods keyed by node class.
         """
-        for key in vars(cls):
+        dispatch = dict(cls._dispatch)
+
+        for key, value in vars(cls).items():
             if key.startswith("visit_"):
                 assert key[6:] in AST._nodes, f"{key} doesn't match any AST node"  # noqa: SLF001
+                dispatch[AST._nodes[key[6:]]] = value  # noqa: SLF001
+
+        cls._dispatch = dispatch
 
 
 def flatten(top):
@@ -199,20 +248,23 @@ def flatten(top):
     debugging and testing.  This returns a list of tuples of the
     form (depth, node) where depth is an integer representing the
     parse tree depth and node is the associated AST node.
+
+    The walk is an explicit stack rather than a recursive visitor so
+    deep filter trees don't pay a Python frame per node.
     """
 
-    class Flattener(NodeVisitor):
-        def __init__(self):
-            self.depth = 0
-            self.nodes = []
+    nodes = []
+    stack = [(0, top)]
+
+    while stack:
+        depth, node = stack.pop()
 
-        def generic_visit(self, node):
-            self.nodes.append((self.depth, node))
-            self.depth += 1
-            NodeVisitor.generic_visit(self, node)
-            self.depth -= 1
+        if isinstance(node, list):
+            stack.extend((depth, item) for item in reversed(node))
 
-    d = Flattener()
-    d.visit(top)
+        elif isinstance(node, AST):
+            nodes.append((depth, node))
+            for field in reversed(node._fields):
+                stack.append((depth + 1, getattr(node, field)))
 
-    return d.nodes
+    return nodes
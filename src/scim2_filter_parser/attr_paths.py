@@ -30,12 +30,141 @@ The classes in this module parse the overall PATH string for its parts so
 that they can be easily used in following code.
 """
 
+import functools
+import itertools
 import json
-import string
+import re
 
-from .lexer import SCIMLexer
-from .parser import SCIMParser
-from .transpilers.sql import Transpiler
+from . import ast
+from .transpilers.sql import AttrPath as SQLAttrPath
+from .transpilers.sql import _sql_by_literal
+
+
+@functools.lru_cache(maxsize=1)
+def _pipeline() -> tuple:
+    """
+    Import the lexer/parser/transpiler modules and build the shared
+    lexer and parser on first use. sly compiles its master regex and
+    LALR tables when those classes are defined, so keeping the imports
+    out of module scope means importing AttrPath stays cheap for
+    consumers that never parse. Both instances keep no state between
+    calls, so one of each is shared per process.
+    """
+    from .lexer import SCIMLexer
+    from .parser import SCIMParser
+    from .transpilers.sql import Transpiler
+
+    return SCIMLexer(), SCIMParser(), Transpiler
+
+
+# Matches the single-comparison filters that dominate SCIM traffic, eg.
+# 'userName eq "bjensen"', 'name.familyName co "O"' or 'title pr'.
+# Anything else falls through to the full parser. Whitespace is limited
+# to space and tab — the only characters the lexer ignores — so filters
+# the lexer would reject never match here.
+_simple_filter_re = re.compile(
+    r"^[ \t]*"
+    r"([a-zA-Z][a-zA-Z0-9_-]*)"  # attr name
+    r"(?:\.([a-zA-Z][a-zA-Z0-9_-]*))?"  # optional sub attr
+    r"[ \t]+([a-zA-Z][a-zA-Z]?)"  # operator
+    r'(?:[ \t]+"([^"]*)")?'  # optional quoted comp value
+    r"[ \t]*$"
+)
+
+# Comparison operators recognized by the fast path, and the full set of
+# words the lexer turns into operator/keyword tokens rather than attr
+# names; filters using the latter as attr names cannot take the fast path.
+_operators = frozenset("eq ne co sw ew pr gt ge lt le".split())
+_keywords = _operators | frozenset("and or not true false null".split())
+
+# Prefix/suffix added to LIKE-style comparison values, as in the SQL
+# transpiler's matching_op_by_scim_op.
+_like_fixes = {
+    "co": ("%", "%"),
+    "sw": ("", "%"),
+    "ew": ("%", ""),
+}
+
+
+def _build_simple(filter_: str, attr_map: dict):
+    """
+    Build the (ast, attr_paths, params) for a trivial 'attr op "value"'
+    filter without touching the lexer or parser; the tree, paths and
+    params all match what the full pipeline would produce. Return None
+    when the filter is not trivial so the caller can run it.
+    """
+    match = _simple_filter_re.match(filter_)
+    if match is None:
+        return None
+
+    attr_name, sub_attr, op, value = match.groups()
+    op = op.lower()
+
+    if op not in _operators:
+        return None
+
+    if attr_name.lower() in _keywords:
+        return None
+
+    if sub_attr is not None and sub_attr.lower() in _keywords:
+        return None
+
+    # 'pr' takes no comparison value; every other operator requires one.
+    if (op == "pr") == (value is not None):
+        return None
+
+    attr_path = ast.AttrPath(
+        attr_name, ast.SubAttr(sub_attr) if sub_attr is not None else None, None
+    )
+    comp_value = ast.CompValue(value) if value is not None else None
+    tree = ast.Filter(ast.AttrExpr(op, attr_path, comp_value), False, None)
+
+    # The same namedtuple type the transpiler reports, so callers see
+    # one path type no matter which route built the cached record.
+    path = SQLAttrPath(attr_name, sub_attr, None)
+    params = {}
+    if attr_map.get(path) is not None:
+        if value is not None:
+            # Quoted JSON literals bind their SQL spellings, exactly
+            # as the transpiler's visit_CompValue emits them.
+            value = _sql_by_literal.get(value, value)
+            if op in _like_fixes:
+                prefix, suffix = _like_fixes[op]
+                value = prefix + value + suffix
+        params["a"] = value
+
+    return tree, (path,), params
+
+
+@functools.lru_cache(maxsize=1024)
+def _build_cached(filter_: str, attr_map_items: tuple) -> tuple:
+    """
+    Run the lexer, parser and transpiler for the given filter and return
+    the (ast, attr_paths, params) produced.
+
+    SCIM workloads tend to repeat the same small set of filters and PATCH
+    paths, so results are memoized on the filter string and the frozen
+    attr map. Only the final outputs are cached; the params dict is
+    copied by callers before use so cached records stay pristine.
+
+    Note that attr map keys are matched case-exactly (the transpiler
+    does straight dict lookups), so the map is rebuilt as-is rather
+    than canonicalized.
+    """
+    attr_map = dict(attr_map_items)
+
+    simple = _build_simple(filter_, attr_map)
+    if simple is not None:
+        return simple
+
+    lexer, parser, transpiler_cls = _pipeline()
+
+    tokens = lexer.tokenize_list(filter_)
+    ast = parser.parse(iter(tokens))
+    transpiler = transpiler_cls(attr_map)
+    transpiler.transpile(ast)
+
+    return ast, tuple(transpiler.attr_paths), transpiler.params
 
 
 class AttrPath:
@@ -45,22 +174,27 @@ class AttrPath:
 
     def __init__(self, filter_: str, attr_map: dict):
         """
-        Perform parsing of path.
+        Store the path for parsing. Parsing itself happens lazily the
+        first time one of the parsed attributes is read.
         """
         self.filter: str = filter_
         self.attr_map: dict = attr_map
 
-        self.token_stream = None
-        self.ast = None
-        self.transpiler = None
+    @functools.cached_property
+    def _parsed(self) -> tuple:
+        return _build_cached(self.filter, tuple(self.attr_map.items()))
 
-        self._build()
+    @property
+    def ast(self):
+        return self._parsed[0]
 
-    def _build(self):
-        self.token_stream = SCIMLexer().tokenize(self.filter)
-        self.ast = SCIMParser().parse(self.token_stream)
-        self.transpiler = Transpiler(self.attr_map)
-        self.transpiler.transpile(self.ast)
+    @property
+    def attr_paths(self) -> tuple:
+        return self._parsed[1]
+
+    @functools.cached_property
+    def params(self) -> dict:
+        return dict(self._parsed[2])
 
     @property
     def is_complex(self) -> bool:
@@ -73,7 +207,7 @@ class AttrPath:
 
            "name.familyName"
         """
-        return len(self.transpiler.attr_paths) > 1
+        return len(self.attr_paths) > 1
 
     @property
     def params_by_attr_paths(self) -> dict:
@@ -84,26 +218,29 @@ class AttrPath:
                ('members', 'value', None):  "2819c223-7f76-453a-919d-413861904646",
            }
         """
-        params_by_paths = {}
-        for i, path in enumerate(self):
-            param_name = string.ascii_lowercase[i]
-            param_value = self.transpiler.params.get(param_name)
-            params_by_paths[path] = param_value
-
-        return params_by_paths
+        # The transpiler assigns param names ('a', 'b', ...) in order,
+        # so the params dict is positional in insertion order and can
+        # be zipped straight onto the paths, padding with None for
+        # paths that produced no parameter.
+        values = itertools.chain(self.params.values(), itertools.repeat(None))
+        return dict(zip(self.attr_paths, values))
 
     @property
     def first_path(self) -> tuple:
         """
         Return first path in list of parsed attr paths.
         """
-        return self.transpiler.attr_paths[0]
+        return self.attr_paths[0]
 
     def __iter__(self):
-        return iter(self.transpiler.attr_paths)
+        return iter(self.attr_paths)
+
+    @functools.cached_property
+    def _json(self) -> str:
+        return json.dumps(self.attr_paths, sort_keys=True, indent="    ")
 
     def __str__(self) -> str:
-        return json.dumps(self.transpiler.attr_paths, sort_keys=True, indent="    ")
+        return self._json
 
 
 def main(argv=None):
@@ -140,8 +140,43 @@ See https://tools.ietf.org/html/rfc7644#section-3.4.2.2 for more details.
 """
 
 # ruff: noqa: F821
+import functools
+import itertools
+import sys
+
 from sly import Lexer
 
+# Operator keywords by the token they resolve to. RFC 7644 operators
+# are case-insensitive, so the lexer registers every case variant of
+# each keyword; true/false/null are not listed because they are JSON
+# literals (RFC 7159) and only valid in lowercase.
+_keyword_by_token = {
+    "EQ": "eq",
+    "NE": "ne",
+    "CO": "co",
+    "SW": "sw",
+    "EW": "ew",
+    "PR": "pr",
+    "GT": "gt",
+    "GE": "ge",
+    "LT": "lt",
+    "LE": "le",
+    "AND": "and",
+    "OR": "or",
+    "NOT": "not",
+}
+
+
+def _case_variants(word):
+    return map("".join, itertools.product(*zip(word, word.upper())))
+
+
+_keyword_remap = {
+    variant: token
+    for token, word in _keyword_by_token.items()
+    for variant in _case_variants(word)
+}
+
 
 class SCIMLexer(Lexer):
     tokens = {
@@ -183,11 +218,15 @@ class SCIMLexer(Lexer):
     #     which takes precedence over "or"
     # 3.  Attribute operators
 
-    ignore = " \t"
+    # Matched as part of the master regex so a run of whitespace is
+    # skipped in one step rather than a Python-loop pass per character.
+    ignore_ws = r"[ \t]+"
 
     @_(r"\.[a-zA-Z$][a-zA-Z0-9_$-]*")
     def SUBATTR(self, t):
-        t.value = t.value.lstrip(".")
+        # Interned so repeated filters over the same schema share one
+        # string object, making downstream dict lookups pointer checks.
+        t.value = sys.intern(t.value.lstrip("."))
         return t
 
     # Grouping Operators
@@ -202,12 +241,15 @@ class SCIMLexer(Lexer):
     FALSE = r"false"
     TRUE = r"true"
     NULL = r"null"
-    NUMBER = r"[0-9]"  # only support integers at this time
+    NUMBER = r"[0-9]+"  # only support integers at this time
 
     # attrPath parts
     @_(r"[a-zA-Z]+:[a-zA-Z0-9:\._-]+:")
     def SCHEMA_URI(self, t):
-        t.value = t.value.rstrip(":")
+        # The pattern always ends on the delimiting colon, so a slice
+        # drops it without rstrip's character-set scan. Interned: the
+        # handful of schema URIs in play recur on every filter.
+        t.value = sys.intern(t.value[:-1])
         return t
 
     # "$" is not allowed as part of an ATTRNAME per RFC 7643. It is allowed
@@ -216,90 +258,60 @@ class SCIMLexer(Lexer):
     # specific tokens.
     ATTRNAME = r"[a-zA-Z$][a-zA-Z0-9_$-]*"
 
-    # Attribute Operators
-    ATTRNAME["eq"] = EQ
-    ATTRNAME["Eq"] = EQ
-    ATTRNAME["eQ"] = EQ
-    ATTRNAME["EQ"] = EQ
-
-    ATTRNAME["ne"] = NE
-    ATTRNAME["Ne"] = NE
-    ATTRNAME["nE"] = NE
-    ATTRNAME["NE"] = NE
-
-    ATTRNAME["co"] = CO
-    ATTRNAME["Co"] = CO
-    ATTRNAME["cO"] = CO
-    ATTRNAME["CO"] = CO
-
-    ATTRNAME["sw"] = SW
-    ATTRNAME["Sw"] = SW
-    ATTRNAME["sW"] = SW
-    ATTRNAME["SW"] = SW
-
-    ATTRNAME["ew"] = EW
-    ATTRNAME["Ew"] = EW
-    ATTRNAME["eW"] = EW
-    ATTRNAME["EW"] = EW
-
-    ATTRNAME["pr"] = PR
-    ATTRNAME["Pr"] = PR
-    ATTRNAME["pR"] = PR
-    ATTRNAME["PR"] = PR
-
-    ATTRNAME["gt"] = GT
-    ATTRNAME["Gt"] = GT
-    ATTRNAME["gT"] = GT
-    ATTRNAME["GT"] = GT
-
-    ATTRNAME["ge"] = GE
-    ATTRNAME["Ge"] = GE
-    ATTRNAME["gE"] = GE
-    ATTRNAME["GE"] = GE
-
-    ATTRNAME["lt"] = LT
-    ATTRNAME["Lt"] = LT
-    ATTRNAME["lT"] = LT
-    ATTRNAME["LT"] = LT
-
-    ATTRNAME["le"] = LE
-    ATTRNAME["Le"] = LE
-    ATTRNAME["lE"] = LE
-    ATTRNAME["LE"] = LE
-
-    # Logical Operators
-    ATTRNAME["and"] = AND
-    ATTRNAME["And"] = AND
-    ATTRNAME["aNd"] = AND
-    ATTRNAME["ANd"] = AND
-    ATTRNAME["anD"] = AND
-    ATTRNAME["AnD"] = AND
-    ATTRNAME["aND"] = AND
-    ATTRNAME["AND"] = AND
-
-    ATTRNAME["or"] = OR
-    ATTRNAME["Or"] = OR
-    ATTRNAME["oR"] = OR
-    ATTRNAME["OR"] = OR
-
-    ATTRNAME["not"] = NOT
-    ATTRNAME["Not"] = NOT
-    ATTRNAME["nOt"] = NOT
-    ATTRNAME["NOt"] = NOT
-    ATTRNAME["noT"] = NOT
-    ATTRNAME["NoT"] = NOT
-    ATTRNAME["nOT"] = NOT
-    ATTRNAME["NOT"] = NOT
+    # Attribute Operators and Logical Operators. Remap every case
+    # variant of each keyword onto its token so post-match resolution
+    # stays a single dict lookup. The loop variable is a tuple because
+    # sly's class namespace refuses to rebind string-valued names.
+    for _remap in _keyword_remap.items():
+        ATTRNAME[_remap[0]] = _remap[1]
+    del _remap
 
     @_(r'"([^"]*)"')
     def COMP_VALUE(self, t):
-        t.value = t.value.strip('"')
+        # The pattern guarantees exactly one quote at each end, so a
+        # slice drops them without strip's character-set scan.
+        t.value = t.value[1:-1]
         return t
 
+    def tokenize_list(self, text) -> list:
+        """
+        Tokenize the given text into a list rather than a generator.
+
+        Filters are short and always consumed in full, so materializing
+        up front lets callers iterate plain list items instead of
+        resuming a generator frame per token.
+        """
+        return list(self.tokenize(text))
+
     def error(self, t):
         raise ValueError(f"Illegal character in filter query '{t.value[0]}'")
 
 
+# Shared instance for callers that don't need their own. tokenize keeps
+# no state between calls, so one lexer can serve the whole process.
+_lexer = SCIMLexer()
+
+
+@functools.lru_cache(maxsize=1024)
+def tokenize_cached(filter_: str) -> tuple:
+    """
+    Tokenize the given filter query, memoizing the result.
+
+    SCIM endpoints see the same filters over and over (pagination,
+    polling, templated queries), so repeat queries skip the lexer
+    entirely. The tokens come back as a tuple: hashable, immutable and
+    safe to hand to any number of callers.
+    """
+    # Empty inputs and those made only of the lexer's ignored
+    # characters (space and tab) produce no tokens; answer them without
+    # spinning up the master-regex scan. Any other whitespace is an
+    # illegal character and must still reach the lexer to raise.
+    if not filter_ or not filter_.strip(" \t"):
+        return ()
+
+    return tuple(_lexer.tokenize_list(filter_))
+
+
 def main(argv=None):
     """
     Main program. Used for testing.
@@ -313,8 +325,7 @@ def main(argv=None):
     parser.add_argument("filter", help="""Eg. 'userName eq "bjensen"'""")
     args = parser.parse_args(argv)
 
-    token_stream = SCIMLexer().tokenize(args.filter)
-    for token in token_stream:
+    for token in tokenize_cached(args.filter):
         print(token)
 
 
@@ -87,6 +87,8 @@ See https://tools.ietf.org/html/rfc7644#section-3.4.2.2 for more details
     expression including the "schemas" attribute (as shown in Figure 2).
 """
 
+import functools
+
 from sly import Parser
 
 from . import ast, lexer
@@ -116,25 +118,21 @@ class SCIMParser(Parser):
 
     # FILTER    = attrExp / logExp / valuePath / *1"not" "(" FILTER ")"
     #                                           ; 0 or 1 "not"s
-    @_("attr_exp")  # noqa: F821
+    @_(  # noqa: F821
+        "attr_exp",
+        "log_exp",
+        "value_path",
+    )
     def filter(self, p):
-        return ast.Filter(p.attr_exp, False, None)
+        return ast.Filter(p[0], False, None)
 
-    @_("log_exp")  # noqa: F821
+    @_("LPAREN filter RPAREN")  # noqa: F821
     def filter(self, p):  # noqa: F811
-        return ast.Filter(p.log_exp, False, None)
+        return ast.Filter(p.filter, False, None)
 
-    @_("value_path")  # noqa: F821
+    @_("NOT LPAREN filter RPAREN")  # noqa: F821
     def filter(self, p):  # noqa: F811
-        return ast.Filter(p.value_path, False, None)
-
-    @_(  # noqa: F821
-        "LPAREN filter RPAREN",
-        "NOT LPAREN filter RPAREN",
-    )
-    def filter(self, p):  # noqa: F811
-        negate = p[0].lower() == "not"
-        return ast.Filter(p.filter, negate, None)
+        return ast.Filter(p.filter, True, None)
 
     # valuePath = attrPath "[" valFilter "]"
     #            ; FILTER uses sub-attributes of a parent attrPath
@@ -152,6 +150,21 @@ class SCIMParser(Parser):
     def value_path(self, p):
         return ast.Filter(p.filter, False, p.attr_path)
 
+    # Trailing sub-attribute after the brackets, eg.
+    # 'emails[type eq "Primary"].value'. Not sure this is in the ABNF
+    # spec but Azure/Microsoft uses it so let's be prepared. For easier
+    # transpiling, complex queries are restructured like so:
+    # emails[type eq "Primary"].value -> emails.value[type eq "Primary"]
+    # by attaching the sub-attribute to the namespace attr_path as it
+    # is built, rather than mutating the tree after the fact.
+    @_("attr_path LBRACKET filter RBRACKET sub_attr")  # noqa: F821
+    def value_path(self, p):  # noqa: F811
+        if p.attr_path.sub_attr is not None:
+            raise SCIMParserError(f"Parsing error at: {p}")
+
+        attr_path = ast.AttrPath(p.attr_path.attr_name, p.sub_attr, p.attr_path.uri)
+        return ast.Filter(p.filter, False, attr_path)
+
     # attrExp   = (attrPath SP "pr") /
     #             (attrPath SP compareOp SP compValue)
     @_(  # noqa: F821
@@ -168,7 +181,10 @@ class SCIMParser(Parser):
     )
     def attr_exp(self, p):
         comp_value = p.comp_value if len(p) == 3 else None
-        return ast.AttrExpr(p[1], p.attr_path, comp_value)
+        # Operators match case-insensitively, so case-fold them here
+        # once and the transpilers can use the value as a lookup key
+        # directly.
+        return ast.AttrExpr(p[1].lower(), p.attr_path, comp_value)
 
     # logExp    = FILTER SP ("and" / "or") SP FILTER
     @_(  # noqa: F821
@@ -176,7 +192,9 @@ class SCIMParser(Parser):
         "filter AND filter",
     )
     def log_exp(self, p):
-        return ast.LogExpr(p[1], p.filter0, p.filter1)
+        # Normalized to upper case here so the transpilers don't have
+        # to re-fold the operator on every visit.
+        return ast.LogExpr(p[1].upper(), p.filter0, p.filter1)
 
     # compValue = false / null / true / number / string
     #            ; rules from JSON (RFC 7159)
@@ -193,46 +211,28 @@ class SCIMParser(Parser):
     # attrPath  = [URI ":"] ATTRNAME *1subAttr
     #             ; SCIM attribute name
     #             ; URI is SCIM "schema" URI
+    # The 'value_path' clause is not in spec but allows us to handle
+    # things like 'members[value eq "6784"] eq ""' which are helpful
+    # for AttrPath parsing for PATCH calls. Each shape gets its own
+    # reducer so no per-reduce length or type tests are needed.
     @_(  # noqa: F821
         "ATTRNAME",
-        "ATTRNAME sub_attr",
-        "SCHEMA_URI ATTRNAME",
-        "SCHEMA_URI ATTRNAME sub_attr",
-        # Next clause is not in spec but allows us to handle things
-        # like 'members[value eq "6784"] eq ""' which are helpful for
-        # AttrPath parsing for PATCH calls.
         "value_path",
-        # Not sure this last clause is in the ABNF spec
-        # but Azure/Microsoft uses it so let's be prepared.
-        "value_path sub_attr",
     )
     def attr_path(self, p):
-        if len(p) == 1:
-            return ast.AttrPath(p[0], None, None)
+        return ast.AttrPath(p[0], None, None)
 
-        elif (
-            len(p) == 2
-            and isinstance(p[0], ast.Filter)
-            and isinstance(p[1], ast.SubAttr)
-        ):
-            sub_attr = p[0].namespace.sub_attr
-            if sub_attr is not None:
-                raise SCIMParserError(f"Parsing error at: {p}")
+    @_("ATTRNAME sub_attr")  # noqa: F821
+    def attr_path(self, p):  # noqa: F811
+        return ast.AttrPath(p[0], p.sub_attr, None)
 
-            # For easier transpiling, convert complex queries like so:
-            # emails[type eq "Primary"].value -> emails.value[type eq "Primary"]
-            p[0].namespace.sub_attr = p[1]
+    @_("SCHEMA_URI ATTRNAME")  # noqa: F821
+    def attr_path(self, p):  # noqa: F811
+        return ast.AttrPath(p[1], None, p[0])
 
-            return ast.AttrPath(p[0], None, None)
-
-        elif len(p) == 2 and isinstance(p[1], ast.SubAttr):
-            return ast.AttrPath(p[0], p[1], None)
-
-        elif len(p) == 2:
-            return ast.AttrPath(p[1], None, p[0])
-
-        else:
-            return ast.AttrPath(p[1], p[2], p[0])
+    @_("SCHEMA_URI ATTRNAME sub_attr")  # noqa: F821
+    def attr_path(self, p):  # noqa: F811
+        return ast.AttrPath(p[1], p.sub_attr, p[0])
 
     # subAttr   = "." ATTRNAME
     #             ; a sub-attribute of a complex attribute
@@ -244,6 +244,27 @@ class SCIMParser(Parser):
         raise SCIMParserError(f"Parsing error at: {p}")
 
 
+# Shared instance for callers that don't need their own. sly compiles
+# the LALR tables when the class is created and parse() keeps no state
+# between calls, so one parser can serve the whole process.
+_parser = SCIMParser()
+
+
+@functools.lru_cache(maxsize=512)
+def parse(filter_: str) -> ast.AST:
+    """
+    Parse the given filter query into an AST.
+
+    Uses the shared lexer and parser instances so callers pay for
+    table construction once per process rather than once per filter,
+    and memoizes the tree per filter string — the same filter arriving
+    against different attr maps only ever parses once. The returned
+    tree is shared between callers and must be treated as read-only;
+    the bundled transpilers never modify it.
+    """
+    return _parser.parse(iter(lexer.tokenize_cached(filter_)))
+
+
 def main(argv=None):
     """
     Main program. Used for testing.
@@ -257,8 +278,7 @@ def main(argv=None):
     parser.add_argument("filter", help="""Eg. 'userName eq "bjensen"'""")
     args = parser.parse_args(argv)
 
-    token_stream = lexer.SCIMLexer().tokenize(args.filter)
-    ast_nodes = SCIMParser().parse(token_stream)
+    ast_nodes = parse(args.filter)
 
     # Output the resulting parse tree structure
     for depth, node in ast.flatten(ast_nodes):
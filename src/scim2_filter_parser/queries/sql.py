@@ -2,11 +2,33 @@
 The logic in this module builds a full SQL query based on a SCIM filter.
 """
 
-from ..lexer import SCIMLexer
-from ..parser import SCIMParser
+import functools
+import re
+
+from ..parser import parse
 from ..transpilers.sql import Transpiler
 
 
+@functools.lru_cache(maxsize=1024)
+def _compile(filter_: str, attr_map_items: tuple) -> tuple:
+    """
+    Lex, parse and transpile the given filter and return the
+    (where_sql, params) produced.
+
+    The pipeline is deterministic per (filter, attr map) pair, and SCIM
+    clients repeat the same small set of filters, so the end result is
+    memoized. Callers must copy the params dict before mutating it.
+    """
+    transpiler = Transpiler(dict(attr_map_items))
+    where_sql, params = transpiler.transpile(parse(filter_))
+
+    return where_sql, params
+
+
+# Matches the transpiler's single-letter param slots, eg. {a}.
+_positional_re = re.compile(r"\{[a-z]\}")
+
+
 class SQLQuery:
     placeholder = "%s"
 
@@ -18,28 +40,47 @@ class SQLQuery:
         self.where_sql: str = None
         self.params_dict: dict = {}
 
-        self.token_stream = None
-        self.ast = None
-        self.transpiler = None
+        # Rendered SQL per placeholder. Keyed by placeholder because
+        # __str__ renders with a different one than execution does.
+        self._sql_cache: dict = {}
 
         self.build_where_sql()
 
     def build_where_sql(self):
-        self.token_stream = SCIMLexer().tokenize(self.filter)
-        self.ast = SCIMParser().parse(self.token_stream)
-        self.transpiler = Transpiler(self.attr_map)
-        self.where_sql, self.params_dict = self.transpiler.transpile(self.ast)
+        # No filter means no WHERE clause (eg. list-all endpoints);
+        # skip the pipeline entirely.
+        if not self.filter:
+            self._where_parts = None
+            return
+
+        where_sql, params = _compile(self.filter, tuple(self.attr_map.items()))
+        self.where_sql = where_sql
+        self.params_dict = dict(params)
+
+        # The where clause split at its {a}-style slots. Every slot is
+        # filled with the same placeholder string, so rendering is a
+        # single join with no format-string parsing at all.
+        if where_sql:
+            self._where_parts = _positional_re.split(where_sql)
+        else:
+            self._where_parts = None
 
     @property
     def params(self):
-        return [
-            self.params_dict[k]
-            for k, _v in sorted(self.params_dict.items())
-            if self.params_dict[k] is not None
-        ]
+        # The transpiler assigns param ids alphabetically in insertion
+        # order, so the dict already iterates in placeholder order and
+        # there is nothing to sort.
+        return [v for v in self.params_dict.values() if v is not None]
+
+    def _render(self, placeholder) -> str:
+        # The query is immutable after __init__, so render once per
+        # placeholder; repeat accesses (logging plus execution) hit
+        # the cache.
+        try:
+            return self._sql_cache[placeholder]
+        except KeyError:
+            pass
 
-    @property
-    def sql(self) -> str:
         lines = [
             f"SELECT DISTINCT {self.table_name}.*",
             f"FROM {self.table_name}",
@@ -50,21 +91,23 @@ class SQLQuery:
 
         # Replace {#} with placeholder string. Different database
         # connectors can override this with their own placeholder character.
-        placeholders = {i: self.placeholder for i in self.params_dict}
-
         if self.where_sql:
-            where_sql = self.where_sql.format(**placeholders)
+            where_sql = placeholder.join(self._where_parts)
             lines.append(f"WHERE {where_sql}")
 
         lines[-1] += ";"  # Complete all SQL with semicolon
 
-        return "\n".join("    " + line for line in lines)
+        sql = "\n".join("    " + line for line in lines)
+        self._sql_cache[placeholder] = sql
+
+        return sql
+
+    @property
+    def sql(self) -> str:
+        return self._render(self.placeholder)
 
     def __str__(self) -> str:
-        orig_placeholder = self.placeholder
-        self.placeholder = "{}"
-        sql = self.sql.format(*self.params)
-        self.placeholder = orig_placeholder
+        sql = self._render("{}").format(*self.params)
 
         # Wrap the SQL in invalid characters so users don't accidentally
         # walk into a SQL Injection vulnerability.
@@ -2,7 +2,7 @@
 The logic in this module builds a Django Q object from an SCIM filter.
 """
 
-import ast
+import functools
 from typing import Mapping
 
 try:
@@ -29,80 +29,106 @@ except ImportError:
 
 
 from scim2_filter_parser import ast as scim2ast
-from scim2_filter_parser.lexer import SCIMLexer
-from scim2_filter_parser.parser import SCIMParser
+from scim2_filter_parser.parser import parse
+
+
+@functools.lru_cache(maxsize=1024)
+def _get_query_cached(scim_query: str, attr_map_items: tuple):
+    """
+    Parse and transpile the given filter and return the Q object
+    produced.
+
+    SCIM clients repeat the same small set of filters (pagination,
+    polling), and the pipeline is deterministic per (filter, attr map)
+    pair, so the end result is memoized. Sharing the Q object is safe:
+    combining or negating a Q builds a new one rather than modifying
+    it in place.
+    """
+    return Transpiler(dict(attr_map_items)).transpile(parse(scim_query))
 
 
 def get_query(scim_query: str, attr_map: Mapping):
-    token_stream = SCIMLexer().tokenize(scim_query)
-    tree = SCIMParser().parse(token_stream)
-    return Transpiler(attr_map).transpile(tree)
+    return _get_query_cached(scim_query, tuple(attr_map.items()))
 
 
 def attr_map_with_lower_keys(attr_map: Mapping) -> Mapping:
-    attr_map_lower_case = {}
-    for (a, b, c), v in attr_map.items():
-        if a:
-            a = a.lower()
-        if b:
-            b = b.lower()
-        if c:
-            c = c.lower()
-        attr_map_lower_case[(a, b, c)] = v
-    return attr_map_lower_case
+    # Values are stored in their Django '__'-separated lookup form up
+    # front so the visitors don't re-run the replacement per node.
+    return {
+        (a.lower() if a else a, b.lower() if b else b, c.lower() if c else c): (
+            v.replace(".", "__") if isinstance(v, str) else v
+        )
+        for (a, b, c), v in attr_map.items()
+    }
 
 
 # noinspection PyPep8Naming
-class Transpiler(ast.NodeTransformer):
+class Transpiler:
     """
     Transpile a SCIM AST into a Q object
     """
 
-    def __init__(self, attr_map: Mapping, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    lookup_by_scim_op = {
+        "eq": "iexact",
+        "ne": "iexact",
+        "co": "icontains",
+        "sw": "istartswith",
+        "ew": "iendswith",
+        "pr": "isnull",
+        "gt": "gt",
+        "ge": "gte",
+        "lt": "lt",
+        "le": "lte",
+    }
+
+    def __init__(self, attr_map: Mapping):
         self.attr_map = attr_map_with_lower_keys(attr_map)
 
     def transpile(self, scim_ast) -> (str, dict):
         return self.visit(scim_ast)
 
-    def visit_Filter(self, node):
-        if node.namespace:
-            # push the namespace from value path down the tree
-            if isinstance(node.expr, scim2ast.Filter):
-                node.expr = scim2ast.Filter(
-                    node.expr.expr, node.expr.negated, node.namespace
-                )
-            elif isinstance(node.expr, scim2ast.LogExpr):
-                expr1 = scim2ast.Filter(
-                    node.expr.expr1.expr, node.expr.expr1.negated, node.namespace
-                )
-                expr2 = scim2ast.Filter(
-                    node.expr.expr2.expr, node.expr.expr2.negated, node.namespace
-                )
-                node.expr = scim2ast.LogExpr(node.expr.op, expr1, expr2)
-            elif isinstance(node.expr, scim2ast.AttrExpr):
-                # namespace takes place of previous attr_name in attr_path
-                sub_attr = scim2ast.SubAttr(node.expr.attr_path.attr_name)
-                attr_path = scim2ast.AttrPath(
-                    node.namespace.attr_name, sub_attr, node.expr.attr_path.uri
-                )
-                node.expr = scim2ast.AttrExpr(
-                    node.expr.value, attr_path, node.expr.comp_value
-                )
-            else:
-                raise NotImplementedError(f"Node {node} can not pass on namespace")
-
-        query = self.visit(node.expr)
+    def visit(self, node):
+        """
+        Dispatch through a table precomputed below the class body
+        rather than the stdlib visitor's per-node 'visit_' + name
+        getattr.
+        """
+        return self._dispatch[type(node)](self, node)
+
+    def visit_Filter(self, node, namespace=None):
+        # Push the namespace from value path down the tree by passing
+        # it along the visit rather than rebuilding subtree nodes; the
+        # (possibly cached and shared) parse tree is never modified.
+        # An enclosing value path's namespace wins over a nested one,
+        # just as the rebuild used to replace the inner namespace.
+        if namespace is None:
+            namespace = node.namespace
+
+        expr = node.expr
+
+        if namespace is None:
+            # Fast path for the common case: with no namespace to push
+            # down, one dispatch-table lookup replaces the isinstance
+            # cascade below.
+            query = self.visit(expr)
+        elif isinstance(expr, scim2ast.Filter):
+            query = self.visit_Filter(expr, namespace)
+        elif isinstance(expr, scim2ast.LogExpr):
+            query = self.visit_LogExpr(expr, namespace)
+        elif isinstance(expr, scim2ast.AttrExpr):
+            query = self.visit_AttrExpr(expr, namespace)
+        else:
+            raise NotImplementedError(f"Node {node} can not pass on namespace")
 
         if query and node.negated:
             query = ~query
 
         return query
 
-    def visit_LogExpr(self, node):
-        q1 = self.visit(node.expr1)
-        q2 = self.visit(node.expr2)
-        op = node.op.upper()
+    def visit_LogExpr(self, node, namespace=None):
+        q1 = self.visit_Filter(node.expr1, namespace)
+        q2 = self.visit_Filter(node.expr2, namespace)
+        op = node.op
         if q1 and q2:
             if op == "AND":
                 return q1 & q2
@@ -140,8 +166,6 @@ class Transpiler(ast.NodeTransformer):
 
     def is_filter(self, node):
         full, partial = self.visit_PartialAttrExpr(node.attr_path.attr_name)
-        if partial and "." in partial:
-            partial = partial.replace(".", "__")
         if full and partial:
             # Specific to Azure
             op, value = self.visit_AttrExprValue(node)
@@ -156,14 +180,23 @@ class Transpiler(ast.NodeTransformer):
         else:
             return None
 
-    def visit_AttrExpr(self, node):
+    def visit_AttrExpr(self, node, namespace=None):
         if isinstance(node.attr_path.attr_name, scim2ast.Filter):
             return self.is_filter(node)
-        attr = self.visit(node.attr_path)
+        if namespace is None:
+            attr = self.attr_map.get(node.attr_path.lower_path_key)
+        else:
+            # namespace takes place of previous attr_name in attr_path
+            uri = node.attr_path.uri
+            attr = self.attr_map.get(
+                (
+                    namespace.attr_name.lower(),
+                    node.attr_path.attr_name.lower(),
+                    uri.lower() if uri else None,
+                )
+            )
         if attr is None:
             return None
-        if "." in attr:
-            attr = attr.replace(".", "__")
         op, value = self.visit_AttrExprValue(node)
         key = attr + "__" + op
         query = Q(**{key: value})
@@ -186,22 +219,11 @@ class Transpiler(ast.NodeTransformer):
         return op, value
 
     def visit_AttrPath(self, node):
-        attr_name_value = node.attr_name.lower()
-        sub_attr_value = None
-        if node.sub_attr:
-            sub_attr_value = node.sub_attr.value.lower()
-
-        uri_value = None
-        if node.uri:
-            uri_value = node.uri.lower()
-
         # Convert attr_name to another value based on map.
         # Otherwise, return None.
-        attr_path_tuple = (attr_name_value, sub_attr_value, uri_value)
-        return self.attr_map.get(attr_path_tuple)
+        return self.attr_map.get(node.lower_path_key)
 
-    @staticmethod
-    def visit_CompValue(node):
+    def visit_CompValue(self, node):
         if node.value == "true":
             return True
         elif node.value == "false":
@@ -211,22 +233,11 @@ class Transpiler(ast.NodeTransformer):
         else:
             return node.value
 
-    @staticmethod
-    def lookup_op(node_value, comp_value):
-        op_code = node_value.lower()
-
-        op = {
-            "eq": "iexact",
-            "ne": "iexact",
-            "co": "icontains",
-            "sw": "istartswith",
-            "ew": "iendswith",
-            "pr": "isnull",
-            "gt": "gt",
-            "ge": "gte",
-            "lt": "lt",
-            "le": "lte",
-        }.get(op_code)
+    def lookup_op(self, node_value, comp_value):
+        # Already case-folded by the parser.
+        op_code = node_value
+
+        op = self.lookup_by_scim_op.get(op_code)
 
         if not op:
             raise ValueError(f"Unknown Django op {op_code}")
@@ -246,3 +257,15 @@ class Transpiler(ast.NodeTransformer):
             return "exact"
 
         return op or node_value
+
+
+Transpiler._dispatch = {  # noqa: SLF001
+    node_cls: getattr(Transpiler, f"visit_{node_cls.__name__}")
+    for node_cls in (
+        scim2ast.Filter,
+        scim2ast.LogExpr,
+        scim2ast.AttrExpr,
+        scim2ast.AttrPath,
+        scim2ast.CompValue,
+    )
+}
@@ -3,7 +3,6 @@ The logic in this module builds a portion of a WHERE SQL
 clause based on a SCIM filter.
 """
 
-import ast
 import collections
 import string
 
@@ -11,8 +10,19 @@ from .. import ast as scim2ast
 
 AttrPath = collections.namedtuple("AttrPath", ["attr_name", "sub_attr", "uri"])
 
+# Param ids handed out by get_next_id, in order. Letter keys are part
+# of the transpiler's output format ({a}-style slots in the SQL).
+_param_ids = string.ascii_lowercase
 
-class Transpiler(ast.NodeTransformer):
+# JSON literals (RFC 7159) mapped straight to their SQL spellings.
+_sql_by_literal = {
+    "true": "TRUE",
+    "false": "FALSE",
+    "null": "NULL",
+}
+
+
+class Transpiler:
     """
     Transpile a SCIM AST into a SQL WHERE clause (not including the "WHERE" keyword)
     """
@@ -36,9 +46,7 @@ class Transpiler(ast.NodeTransformer):
         "ew": ("%", ""),
     }
 
-    def __init__(self, attr_map, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-
+    def __init__(self, attr_map):
         self.attr_map = attr_map
         self.params = {}
         self.attr_paths = []
@@ -48,44 +56,48 @@ class Transpiler(ast.NodeTransformer):
 
         return sql, self.params
 
-    def visit_Filter(self, node):
-        if node.namespace:
-            # push the namespace from value path down the tree
-            if isinstance(node.expr, scim2ast.Filter):
-                node.expr = scim2ast.Filter(
-                    node.expr.expr, node.expr.negated, node.namespace
-                )
-            elif isinstance(node.expr, scim2ast.LogExpr):
-                expr1 = scim2ast.Filter(
-                    node.expr.expr1.expr, node.expr.expr1.negated, node.namespace
-                )
-                expr2 = scim2ast.Filter(
-                    node.expr.expr2.expr, node.expr.expr2.negated, node.namespace
-                )
-                node.expr = scim2ast.LogExpr(node.expr.op, expr1, expr2)
-            elif isinstance(node.expr, scim2ast.AttrExpr):
-                # namespace takes place of previous attr_name in attr_path
-                sub_attr = scim2ast.SubAttr(node.expr.attr_path.attr_name)
-                attr_path = scim2ast.AttrPath(
-                    node.namespace.attr_name, sub_attr, node.expr.attr_path.uri
-                )
-                node.expr = scim2ast.AttrExpr(
-                    node.expr.value, attr_path, node.expr.comp_value
-                )
-            else:
-                raise NotImplementedError(f"Node {node} can not pass on namespace")
-
-        expr = self.visit(node.expr)
+    def visit(self, node):
+        """
+        Dispatch through a table precomputed below the class body
+        rather than the stdlib visitor's per-node 'visit_' + name
+        getattr.
+        """
+        return self._dispatch[type(node)](self, node)
+
+    def visit_Filter(self, node, namespace=None):
+        # Push the namespace from value path down the tree by passing
+        # it along the visit rather than rebuilding subtree nodes; the
+        # (possibly cached and shared) parse tree is never modified.
+        # An enclosing value path's namespace wins over a nested one,
+        # just as the rebuild used to replace the inner namespace.
+        if namespace is None:
+            namespace = node.namespace
+
+        expr = node.expr
+
+        if namespace is None:
+            # Fast path for the common case: with no namespace to push
+            # down, one dispatch-table lookup replaces the isinstance
+            # cascade below.
+            sql = self.visit(expr)
+        elif isinstance(expr, scim2ast.Filter):
+            sql = self.visit_Filter(expr, namespace)
+        elif isinstance(expr, scim2ast.LogExpr):
+            sql = self.visit_LogExpr(expr, namespace)
+        elif isinstance(expr, scim2ast.AttrExpr):
+            sql = self.visit_AttrExpr(expr, namespace)
+        else:
+            raise NotImplementedError(f"Node {node} can not pass on namespace")
 
-        if expr and node.negated:
-            expr = f"NOT ({expr})"
+        if sql and node.negated:
+            sql = f"NOT ({sql})"
 
-        return expr
+        return sql
 
-    def visit_LogExpr(self, node):
-        expr1 = self.visit(node.expr1)
-        expr2 = self.visit(node.expr2)
-        op = node.op.upper()
+    def visit_LogExpr(self, node, namespace=None):
+        expr1 = self.visit_Filter(node.expr1, namespace)
+        expr2 = self.visit_Filter(node.expr2, namespace)
+        op = node.op
 
         if expr1 and expr2:
             return f"({expr1}) {op} ({expr2})"
@@ -120,16 +132,16 @@ class Transpiler(ast.NodeTransformer):
 
         return full, partial
 
-    def visit_AttrExpr(self, node):
+    def visit_AttrExpr(self, node, namespace=None):
         if isinstance(node.attr_path.attr_name, scim2ast.Filter):
             full, partial = self.visit_PartialAttrExpr(node.attr_path.attr_name)
             if full and partial:
-                value = self.visit_AttrExprValue(node)
+                value = self.visit_AttrExprValue(node, node.case_insensitive)
                 return f"({full} AND {partial} {value})"
             elif full:
                 return full
             elif partial:
-                value = self.visit_AttrExprValue(node)
+                value = self.visit_AttrExprValue(node, node.case_insensitive)
                 return f"{partial} {value}"
             else:
                 return None
@@ -139,19 +151,33 @@ class Transpiler(ast.NodeTransformer):
             # insensitive and userName can not be a nested part of a complex query (eg.
             # emails.type in emails[type eq "Primary"]...).
             # https://datatracker.ietf.org/doc/html/rfc7643#section-4.1.1
-            attr = self.visit(node.attr_path)
+            if namespace is not None:
+                # namespace takes place of previous attr_name in attr_path
+                path_key = (
+                    namespace.attr_name,
+                    node.attr_path.attr_name,
+                    node.attr_path.uri,
+                )
+                case_insensitive = namespace.attr_name == "userName"
+            else:
+                path_key = node.attr_path.path_key
+                case_insensitive = node.case_insensitive
+
+            attr = self.lookup_attr(path_key)
             if attr is None:
                 return None
 
-            value = self.visit_AttrExprValue(node)
+            value = self.visit_AttrExprValue(node, case_insensitive)
 
-            if node.case_insensitive:
+            if case_insensitive:
                 return f"UPPER({attr}) {value}"
 
             return f"{attr} {value}"
 
-    def visit_AttrExprValue(self, node):
-        op_sql = self.lookup_op(node.value)
+    def visit_AttrExprValue(self, node, case_insensitive=False):
+        # Already case-folded by the parser.
+        op_code = node.value
+        op_sql = self.lookup_op(op_code)
 
         item_id = self.get_next_id()
 
@@ -164,9 +190,9 @@ class Transpiler(ast.NodeTransformer):
         # prep item_id to be a str replacement placeholder
         item_id_placeholder = "{" + item_id + "}"
 
-        if node.value.lower() in self.matching_op_by_scim_op.keys():
+        if op_code in self.matching_op_by_scim_op:
             # Add appropriate % signs to values in LIKE clause
-            prefix, suffix = self.lookup_like_matching(node.value)
+            prefix, suffix = self.lookup_like_matching(op_code)
             value = prefix + self.visit(node.comp_value) + suffix
 
         else:
@@ -174,55 +200,42 @@ class Transpiler(ast.NodeTransformer):
 
         self.params[item_id] = value
 
-        if node.case_insensitive:
+        if case_insensitive:
             return f"{op_sql} UPPER({item_id_placeholder})"
 
         return f"{op_sql} {item_id_placeholder}"
 
-    def visit_AttrPath(self, node):
-        attr_name_value = node.attr_name
-
-        sub_attr_value = None
-        if node.sub_attr:
-            sub_attr_value = node.sub_attr.value
-
-        uri_value = None
-        if node.uri:
-            uri_value = node.uri
-
-        # Convert attr_name to another value based on map.
+    def lookup_attr(self, path_key):
+        # Convert the path to another value based on map.
         # Otherwise, return None.
-        attr_path_tuple = AttrPath(attr_name_value, sub_attr_value, uri_value)
+        attr_path_tuple = AttrPath(*path_key)
         self.attr_paths.append(attr_path_tuple)
         return self.attr_map.get(attr_path_tuple)
 
-    def visit_CompValue(self, node):
-        if node.value in ("true", "false", "null"):
-            return node.value.upper()
+    def visit_AttrPath(self, node):
+        return self.lookup_attr(node.path_key)
 
+    def visit_CompValue(self, node):
         # TODO: Handle timestamps!
-
-        return node.value
+        return _sql_by_literal.get(node.value, node.value)
 
     def get_next_id(self):
-        index = len(self.params)
-        if index >= len(string.ascii_lowercase):
-            raise IndexError("Too many params in query. Can not store all of them.")
-        return string.ascii_lowercase[index]
-
-    def lookup_op(self, node_value):
-        op_code = node_value.lower()
-
+        try:
+            return _param_ids[len(self.params)]
+        except IndexError:
+            raise IndexError(
+                "Too many params in query. Can not store all of them."
+            ) from None
+
+    def lookup_op(self, op_code):
         sql = self.binary_op_by_scim_op.get(op_code)
 
         if not sql:
             raise ValueError(f"Unknown SQL op {op_code}")
 
-        return sql or node_value
-
-    def lookup_like_matching(self, node_value):
-        op_code = node_value.lower()
+        return sql
 
+    def lookup_like_matching(self, op_code):
         sql = self.matching_op_by_scim_op.get(op_code)
 
         if not sql:
@@ -231,6 +244,18 @@ class Transpiler(ast.NodeTransformer):
         return sql
 
 
+Transpiler._dispatch = {  # noqa: SLF001
+    node_cls: getattr(Transpiler, f"visit_{node_cls.__name__}")
+    for node_cls in (
+        scim2ast.Filter,
+        scim2ast.LogExpr,
+        scim2ast.AttrExpr,
+        scim2ast.AttrPath,
+        scim2ast.CompValue,
+    )
+}
+
+
 def main(argv=None):
     """
     Main program. Used for testing.
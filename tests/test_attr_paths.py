@@ -4,6 +4,7 @@ from io import StringIO
 from unittest import TestCase
 
 from scim2_filter_parser import attr_paths as attr_paths_mod
+from scim2_filter_parser.parser import SCIMParserError
 
 
 class TestAttrPathMixin:
@@ -336,6 +337,76 @@ class GroupQueries(TestAttrPathMixin, TestCase):
         self.assertAttrPath(query, attr_paths)
         self.assertAttrPathParams(query, params_dict)
 
+    def test_path_with_trailing_sub_attr(self):
+        # RFC 7644, Figure 8: "members[value eq \"...\"].displayName"
+        query = 'members[value eq "337991"].displayName'
+        attr_paths = [
+            ("members", "value", None),
+        ]
+        params_dict = {
+            ("members", "value", None): "337991",
+        }
+        self.assertAttrPath(query, attr_paths)
+        self.assertAttrPathParams(query, params_dict)
+
+
+class SimpleFilterQueries(TestAttrPathMixin, TestCase):
+    """
+    Edge cases around the single-comparison filters that are built
+    without running the full lexer/parser pipeline. Filters that only
+    look simple must still reach the parser and fail like they always
+    have.
+    """
+
+    attr_map = {
+        ("userName", None, None): "username",
+        ("schemas", None, None): "schemas",
+    }
+
+    def test_like_value_gets_wildcards(self):
+        query = 'userName co "mal"'
+        self.assertAttrPathParams(query, {("userName", None, None): "%mal%"})
+
+    def test_quoted_json_literal_binds_sql_spelling(self):
+        query = 'schemas eq "false"'
+        self.assertAttrPathParams(query, {("schemas", None, None): "FALSE"})
+
+    def test_unmapped_attr_has_path_but_no_params(self):
+        query = 'nickName eq "BB"'
+        self.assertAttrPath(query, [("nickName", None, None)])
+        self.assertAttrPathParams(query, {("nickName", None, None): None})
+
+    def test_first_path_supports_attr_name_access(self):
+        attr_paths = attr_paths_mod.AttrPath('userName eq "bjensen"', self.attr_map)
+        self.assertEqual(attr_paths.first_path.attr_name, "userName")
+
+    def test_pr_has_value_none_param(self):
+        query = "userName pr"
+        self.assertAttrPathParams(query, {("userName", None, None): None})
+
+    def test_pr_with_value_is_rejected(self):
+        attr_paths = attr_paths_mod.AttrPath('userName pr "x"', self.attr_map)
+        with self.assertRaises(SCIMParserError):
+            attr_paths.params
+
+    def test_comparison_without_value_is_rejected(self):
+        attr_paths = attr_paths_mod.AttrPath("userName eq", self.attr_map)
+        with self.assertRaises(SCIMParserError):
+            attr_paths.params
+
+    def test_keyword_attr_name_is_rejected(self):
+        attr_paths = attr_paths_mod.AttrPath('pr eq "x"', self.attr_map)
+        with self.assertRaises(SCIMParserError):
+            attr_paths.params
+
+    def test_illegal_whitespace_is_rejected(self):
+        # The lexer only ignores space and tab; any other whitespace is
+        # an illegal character and must stay one.
+        for query in ('userName\neq "x"', 'userName eq "x"\r', 'userName\xa0eq\xa0"x"'):
+            attr_paths = attr_paths_mod.AttrPath(query, self.attr_map)
+            with self.assertRaises(ValueError):
+                attr_paths.params
+
 
 class CommandLine(TestCase):
     def setUp(self):
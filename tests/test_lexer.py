@@ -305,6 +305,15 @@ class RegressionTestQueries(TestCase):
         ]
         self.assertTokens(query, expected)
 
+    def test_multi_digit_number_is_one_token(self):
+        query = "price gt 123"
+        expected = [
+            ("ATTRNAME", "price"),
+            ("GT", "gt"),
+            ("NUMBER", "123"),
+        ]
+        self.assertTokens(query, expected)
+
     def test_members(self):
         query = 'members[value eq "6784"] eq ""'
         expected = [
@@ -451,6 +460,19 @@ class AzureQueries(TestCase):
         self.assertTokens(query, expected)
 
 
+class TokenizeCachedQueries(TestCase):
+    def test_ignored_characters_only_yield_no_tokens(self):
+        for query in ("", " ", "\t", " \t "):
+            self.assertEqual((), lexer.tokenize_cached(query))
+
+    def test_other_whitespace_is_still_illegal(self):
+        # Only space and tab are ignored; any other whitespace must
+        # reach the lexer and raise like it always has.
+        for query in ("\n", "\r", "\xa0"):
+            with self.assertRaises(ValueError):
+                lexer.tokenize_cached(query)
+
+
 class CommandLine(TestCase):
     def setUp(self):
         self.original_stdout = sys.stdout
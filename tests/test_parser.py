@@ -33,6 +33,38 @@ class RegressionTestQueries(TestCase):
         self.assertEqual(result, expected)
 
 
+class PatchPathQueries(TestCase):
+    """
+    The bare PATCH path shapes from RFC 7644, Figure 8. The trailing
+    sub-attribute form is accepted as a top-level filter so that
+    attr_paths.AttrPath can parse it directly.
+    """
+
+    def setUp(self):
+        self.original_stdout = sys.stdout
+        sys.stdout = self.test_stdout = StringIO()
+
+    def tearDown(self):
+        sys.stdout = self.original_stdout
+
+    def test_value_path_with_trailing_sub_attr(self):
+        parser.main(
+            ['members[value eq "2819c223-7f76-453a-919d-413861904646"].displayName']
+        )
+        result = self.test_stdout.getvalue().strip().split("\n")
+        expected = [
+            "Filter(expr=Filter, negated=False, namespace=None)",
+            "     Filter(expr=Filter, negated=False, namespace=AttrPath)",
+            "         Filter(expr=AttrExpr, negated=False, namespace=None)",
+            "             AttrExpr(value='eq', attr_path=AttrPath, comp_value=CompValue)",
+            "                 AttrPath(attr_name='value', sub_attr=None, uri=None)",
+            "                 CompValue(value='2819c223-7f76-453a-919d-413861904646')",
+            "         AttrPath(attr_name='members', sub_attr=SubAttr, uri=None)",
+            "             SubAttr(value='displayName')",
+        ]
+        self.assertEqual(result, expected)
+
+
 class BuggyQueries(TestCase):
     def setUp(self):
         self.lexer = lexer.SCIMLexer()
@@ -46,6 +78,19 @@ class BuggyQueries(TestCase):
         with self.assertRaises(parser.SCIMParserError):
             self.parser.parse(token_stream)
 
+    def test_stray_quote_raises_lexer_error(self):
+        # parse() materializes the whole token stream before parsing,
+        # so the stray quote surfaces as the lexer's ValueError rather
+        # than a SCIMParserError part way through the parse.
+        with self.assertRaises(ValueError):
+            parser.parse('userName eq "with "quote"')
+
+    def test_multi_digit_number_comp_value(self):
+        query = "price gt 123"
+
+        tokens = self.lexer.tokenize(query)
+        self.parser.parse(tokens)  # Should not raise error
+
     def test_g17_1_log_exp_order(self):
         query = 'displayName co "username"  or nickName co "username"  or userName co "username"'
 
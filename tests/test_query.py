@@ -415,6 +415,21 @@ class GeneralQueries(unittest.TestCase):
         expected_rows = [(1, "Paul")]
         self.assertRows(query, expected_rows)
 
+    def test_no_filter_builds_query_without_where_clause(self):
+        # List-all endpoints pass no filter at all; the query is built
+        # with no WHERE clause instead of raising a parse error.
+        for empty_filter in (None, ""):
+            q = queries_sql.SQLiteQuery(
+                empty_filter, "users", self.ATTR_MAP, self.JOINS
+            )
+
+            self.assertNotIn("WHERE", q.sql)
+            self.assertEqual([], q.params)
+
+            self.cursor.execute(q.sql, q.params)
+            expected_rows = [(1, "Paul"), (2, "Chris"), (3, "Eileen")]
+            self.assertEqual(expected_rows, self.cursor.fetchall())
+
 
 class CommandLine(unittest.TestCase):
     def setUp(self):
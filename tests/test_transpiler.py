@@ -427,6 +427,22 @@ class AzureQueries(SetupHelper, TestCase):
         self.assertSQL(query, sql, params)
 
 
+class NestedValuePathQueries(SetupHelper, TestCase):
+    attr_map = {
+        ("emails", "type", None): "emails.type",
+    }
+
+    def test_outer_namespace_wins(self):
+        query = 'emails[ims[type eq "xmpp"]]'
+        sql = "emails.type = {a}"
+        params = {"a": "xmpp"}
+        self.assertSQL(query, sql, params)
+
+    def test_inner_namespace_is_ignored(self):
+        query = 'members[emails[type eq "work"]]'
+        self.assertSQL(query, None, {})
+
+
 class GitHubBugsQueries(SetupHelper, TestCase):
     attr_map = {
         ("emails", "type", None): "emails.type",
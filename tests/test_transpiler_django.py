@@ -155,6 +155,16 @@ class TestRFCExamples(TestCase):
         django = Q(is_active__exact=True)
         self.assert_q(scim, django)
 
+    def test_nested_value_path_outer_namespace_wins(self):
+        scim = 'emails[ims[type eq "xmpp"]]'
+        django = Q(emails__type__iexact="xmpp")
+        self.assert_q(scim, django)
+
+    def test_nested_value_path_inner_namespace_is_ignored(self):
+        scim = 'members[emails[type eq "work"]]'
+        django = None
+        self.assert_q(scim, django)
+
 
 class TestUndefinedAttributes(TestCase):
     def assert_q(self, scim, attr_map, expected):